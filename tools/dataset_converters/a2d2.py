@@ -0,0 +1,352 @@
+import argparse
+import io
+import json
+import mmap
+import os
+import os.path as osp
+import random
+import re
+from dataclasses import asdict, dataclass, is_dataclass
+
+import mmcv
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+# All A2D2 camera images share the same resolution
+IMG_WIDTH = 1920
+IMG_HEIGHT = 1208
+
+# Minimum label file size for memory-mapped parsing
+MMAP_MIN_SIZE = 4096
+
+CLASSES_A2D2 = ('Car', 'Pedestrian', 'Truck', 'VanSUV', 'Cyclist', 'Bus',
+                'MotorBiker', 'Bicycle', 'UtilityVehicle', 'Motorcycle',
+                'CaravanTransporter', 'Animal', 'Trailer', 'EmergencyVehicle')
+CLASSES_CITYSCAPES = ('person', 'rider', 'car', 'truck', 'bus', 'train',
+                      'motorcycle', 'bicycle')
+
+CATEGORY_A2D2_IDX = {name: idx for idx, name in enumerate(CLASSES_A2D2)}
+# Maps A2D2 classes to Cityscapes instance categories. Classes without a
+# counterpart (e.g. 'Animal') map to None and are skipped.
+CATEGORY_CITYSCAPES_IDX = {
+    'Car': 2,
+    'Pedestrian': 0,
+    'Truck': 3,
+    'VanSUV': 2,
+    'Cyclist': 1,
+    'Bus': 4,
+    'MotorBiker': 1,
+    'Bicycle': 7,
+    'UtilityVehicle': 3,
+    'Motorcycle': 6,
+    'CaravanTransporter': 3,
+    'Trailer': 3,
+    'EmergencyVehicle': 2,
+}
+
+
+_LABEL2IMG_RE = re.compile(r'/label3D/|_label3D_|\.json$')
+_LABEL2IMG_SUB = {
+    '/label3D/': '/camera/',
+    '_label3D_': '_camera_',
+    '.json': '.png',
+}
+
+
+def label2img_path(label_path):
+    """Convert a label3D .json path to the corresponding camera .png path."""
+    # One compiled-regex pass instead of three str.replace scans
+    return _LABEL2IMG_RE.sub(lambda m: _LABEL2IMG_SUB[m.group(0)], label_path)
+
+
+def scan_label_paths(data_dir):
+    """Yield all label3D .json paths in a dataset directory.
+
+    Uses nested os.scandir instead of glob; DirEntry objects cache stat
+    info and skip the per-entry fnmatch, which is considerably faster on
+    tens of thousands of label files.
+    """
+    for seq_entry in os.scandir(data_dir):
+        label_dir = osp.join(seq_entry.path, 'label3D')
+        if not seq_entry.is_dir() or not osp.isdir(label_dir):
+            continue
+        for cam_entry in os.scandir(label_dir):
+            if not cam_entry.is_dir():
+                continue
+            for entry in os.scandir(cam_entry.path):
+                if entry.name.endswith('.json'):
+                    yield entry.path
+
+
+def collect_img_label_path_pairs(data_dir):
+    """Collect (img_path, label_path) pairs for all label files in a dataset.
+
+    A2D2 sequences are laid out as
+    ``<data_dir>/<sequence>/label3D/<camera>/<frame>.json`` with the
+    corresponding image under ``camera/`` with a ``.png`` suffix.
+    """
+    return [(label2img_path(path), path)
+            for path in scan_label_paths(data_dir)]
+
+
+def split_sample_list(img_label_pairs, val_ratio, test_ratio):
+    """Randomly partition sample pairs into train/val/test splits.
+
+    Samples val + test indices with random.sample and buckets the pairs
+    in a single pass, avoiding the O(N) shuffle and the three sliced
+    copies of the full pair list.
+    """
+    tot_N = len(img_label_pairs)
+    val_N = int(val_ratio * tot_N)
+    test_N = int(test_ratio * tot_N)
+    eval_idxs = random.sample(range(tot_N), val_N + test_N)
+    val_idxs = set(eval_idxs[:val_N])
+    test_idxs = set(eval_idxs[val_N:])
+    splits = {'train': [], 'val': [], 'test': []}
+    for idx, pair in enumerate(img_label_pairs):
+        if idx in val_idxs:
+            splits['val'].append(pair)
+        elif idx in test_idxs:
+            splits['test'].append(pair)
+        else:
+            splits['train'].append(pair)
+    return splits
+
+
+def gen_ann_entry(ann_raw, img_idx, cat_map):
+    """Convert one raw A2D2 box annotation to a COCO annotation entry.
+
+    Returns None if the class has no category in the target dataset. The
+    entry carries no 'id' key; the parent stamps globally unique ids when
+    merging worker results.
+    """
+    category_id = cat_map.get(ann_raw['class'])
+    if category_id is None:
+        return None
+    a2d2_bbox = ann_raw['2d_bbox']
+    # A2D2 box is (x_min, y_min, x_max, y_max) --> COCO (x, y, w, h)
+    width = a2d2_bbox[2] - a2d2_bbox[0]
+    height = a2d2_bbox[3] - a2d2_bbox[1]
+    return {
+        'image_id': img_idx,
+        'category_id': category_id,
+        'bbox': [a2d2_bbox[0], a2d2_bbox[1], width, height],
+        'area': width * height,
+        'iscrowd': 0,
+    }
+
+
+def gen_ann_entries(task):
+    """Generate COCO annotation entries for all boxes in one label file.
+
+    Takes a single (ann_path, img_idx, dataset_style) tuple so the function
+    can be dispatched to worker processes. Entries are returned without
+    ids; the caller stamps globally unique ones.
+    """
+    ann_path, img_idx, dataset_style = task
+    # Resolve the category map once per file instead of once per box
+    cat_map = (CATEGORY_CITYSCAPES_IDX
+               if dataset_style == 'cityscapes' else CATEGORY_A2D2_IDX)
+    # Decode with orjson, parsing larger files straight from a memory map
+    # to skip the userspace copy; below MMAP_MIN_SIZE the mmap setup cost
+    # dominates and a plain read is faster
+    with open(ann_path, 'rb') as f:
+        if (orjson is not None
+                and os.fstat(f.fileno()).st_size >= MMAP_MIN_SIZE):
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+                view = memoryview(mm)
+                try:
+                    anns = orjson.loads(view)
+                finally:
+                    view.release()
+        elif orjson is not None:
+            anns = orjson.loads(f.read())
+        else:
+            anns = json.loads(f.read())
+    ann_entries = []
+    for ann_raw in anns.values():
+        ann_entry = gen_ann_entry(ann_raw, img_idx, cat_map)
+        if ann_entry is not None:
+            ann_entries.append(ann_entry)
+    return img_idx, ann_entries
+
+
+def gen_cat_entries(dataset_style):
+    """Generate COCO category entries for the target dataset taxonomy."""
+    if dataset_style == 'a2d2':
+        classes = CLASSES_A2D2
+    elif dataset_style == 'cityscapes':
+        classes = CLASSES_CITYSCAPES
+    else:
+        raise ValueError(f'Invalid dataset style: {dataset_style}')
+    return [{'id': idx, 'name': name} for idx, name in enumerate(classes)]
+
+
+@dataclass
+class ImgEntry:
+    """COCO image entry, serialized natively by orjson at write time."""
+
+    id: int
+    file_name: str
+    width: int = IMG_WIDTH
+    height: int = IMG_HEIGHT
+
+
+def dumps(obj):
+    """Encode an object as JSON bytes with orjson when available."""
+    if orjson is not None:
+        return orjson.dumps(obj)
+    if is_dataclass(obj):
+        obj = asdict(obj)
+    return json.dumps(obj).encode()
+
+
+# Output buffering: 1 MB writer buffer, flushed in batches of 100 records
+WRITE_BUF_SIZE = 1 << 20
+WRITE_BATCH_N = 100
+
+
+def batch_write(f, chunks):
+    """Write an iterable of byte chunks in batches of WRITE_BATCH_N.
+
+    Accumulating ~100 encoded records per write amortizes the per-record
+    call overhead on top of the buffered writer.
+    """
+    buf = bytearray()
+    for idx, chunk in enumerate(chunks, 1):
+        buf += chunk
+        if idx % WRITE_BATCH_N == 0:
+            f.write(buf)
+            buf.clear()
+    if buf:
+        f.write(buf)
+
+
+def write_ndjson_file(cat_entries, img_entries, ann_entries, split, out_dir):
+    """Write one split as a JSON-Lines (.jsonl) annotation file.
+
+    Line 1 is a header record with the categories, followed by one record
+    per image and one record per annotation. Downstream consumers can
+    process records as they arrive instead of loading one monolithic file.
+    """
+    out_path = osp.join(out_dir, f'a2d2_{split}.jsonl')
+    with io.BufferedWriter(
+            open(out_path, 'wb', buffering=0),
+            buffer_size=WRITE_BUF_SIZE) as f:
+        f.write(dumps({'type': 'header', 'categories': cat_entries}) + b'\n')
+        batch_write(f, (dumps({
+            'type': 'image',
+            **asdict(img_entry)
+        }) + b'\n' for img_entry in img_entries))
+        batch_write(f, (dumps({
+            'type': 'annotation',
+            **ann_entry
+        }) + b'\n' for ann_entry in ann_entries))
+
+
+def write_json_file(cat_entries, img_entries, ann_entries, split, out_dir,
+                    pretty_json=False):
+    """Write one split as a COCO format .json annotation file.
+
+    The 'images' and 'annotations' arrays are streamed to the file one
+    entry at a time instead of encoding the whole dict in one go, which
+    avoids duplicating the entire annotation list as an intermediate
+    string. Pretty mode writes one entry per line.
+    """
+    out_path = osp.join(out_dir, f'a2d2_{split}.json')
+    sep = b',\n' if pretty_json else b','
+    with io.BufferedWriter(
+            open(out_path, 'wb', buffering=0),
+            buffer_size=WRITE_BUF_SIZE) as f:
+        f.write(b'{"categories": ')
+        f.write(dumps(cat_entries))
+        f.write(b', "images": [')
+        batch_write(f, (sep + dumps(e) if idx > 0 else dumps(e)
+                        for idx, e in enumerate(img_entries)))
+        f.write(b'], "annotations": [')
+        batch_write(f, (sep + dumps(e) if idx > 0 else dumps(e)
+                        for idx, e in enumerate(ann_entries)))
+        f.write(b']}')
+
+
+def parse_args():
+    parser = argparse.ArgumentParser(
+        description='Convert A2D2 3D bounding box annotations to COCO format')
+    parser.add_argument('data_dir', help='a2d2 data path')
+    parser.add_argument('-o', '--out-dir', help='output path')
+    parser.add_argument(
+        '--dataset-style',
+        default='a2d2',
+        choices=('a2d2', 'cityscapes'),
+        help='category taxonomy of the generated annotations')
+    parser.add_argument(
+        '--val-ratio', default=0.1, type=float, help='val split ratio')
+    parser.add_argument(
+        '--test-ratio', default=0.1, type=float, help='test split ratio')
+    parser.add_argument(
+        '--seed', default=0, type=int, help='random seed for the split')
+    parser.add_argument(
+        '--ndjson',
+        action='store_true',
+        help='write JSON-Lines (.jsonl) files instead of monolithic .json')
+    parser.add_argument(
+        '--pretty',
+        dest='pretty_json',
+        action='store_true',
+        help='write one entry per line instead of compact .json files')
+    parser.add_argument(
+        '--nproc', default=1, type=int, help='number of process')
+    args = parser.parse_args()
+    return args
+
+
+def main():
+    args = parse_args()
+    data_dir = args.data_dir
+    out_dir = args.out_dir if args.out_dir else data_dir
+    mmcv.mkdir_or_exist(out_dir)
+
+    random.seed(args.seed)
+    img_label_pairs = collect_img_label_path_pairs(data_dir)
+    print(f'Found {len(img_label_pairs)} samples in {data_dir}')
+    splits = split_sample_list(img_label_pairs, args.val_ratio,
+                               args.test_ratio)
+
+    dataset_style = args.dataset_style
+    cat_entries = gen_cat_entries(dataset_style)
+    for name, split in splits.items():
+        print(f'Converting {name} split ({len(split)} samples)')
+        img_entries = [
+            ImgEntry(img_idx, img_path)
+            for img_idx, (img_path, _) in enumerate(split)
+        ]
+        tasks = [(ann_path, img_idx, dataset_style)
+                 for img_idx, (_, ann_path) in enumerate(split)]
+        # Label file parsing is embarrassingly parallel; distribute it over
+        # worker processes and restamp ids sequentially in the parent so
+        # they stay unique and stable
+        if args.nproc > 1:
+            results = mmcv.track_parallel_progress(
+                gen_ann_entries, tasks, nproc=args.nproc)
+        else:
+            results = mmcv.track_progress(gen_ann_entries, tasks)
+        ann_entries = []
+        ann_idx = 0
+        for _, ann_entries_ in results:
+            for ann_entry in ann_entries_:
+                ann_entry['id'] = ann_idx
+                ann_idx += 1
+            ann_entries.extend(ann_entries_)
+        if args.ndjson:
+            write_ndjson_file(cat_entries, img_entries, ann_entries, name,
+                              out_dir)
+        else:
+            write_json_file(cat_entries, img_entries, ann_entries, name,
+                            out_dir, args.pretty_json)
+
+
+if __name__ == '__main__':
+    main()